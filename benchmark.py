@@ -0,0 +1,216 @@
+# Headless benchmarks for the algorithms in this repo
+# Everything is seeded so runs can be compared against each other, and the
+# results are printed as JSON, i.e.
+#   python benchmark.py --only reversi markov --output before.json
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, "reversi"))
+sys.path.insert(0, os.path.join(ROOT, "matrix_factorisation"))
+sys.path.insert(0, ROOT)
+
+SEED = 2020
+
+
+# Reversi
+################################################################################
+# Play seeded random moves from the start to get a fixed set of positions
+def reversi_positions(plies, seed):
+    from game import Game
+
+    rng = random.Random(seed)
+    positions = []
+    for ply in plies:
+        g = Game()
+        while g.turn < ply and not g.over():
+            g.go(*rng.choice(g.find_valid(g.p)))
+        positions.append(g)
+    return positions
+
+
+# Search each position at a fixed depth, reporting the move and nodes/sec
+def bench_reversi(depth, plies=(4, 11, 20, 27, 36, 43)):
+    import computer
+
+    results = []
+    for g in reversi_positions(plies, SEED):
+        computer.clear_tables()
+        computer.start_stats()
+        score, pv = computer.search(g, depth)
+        stats = computer.stop_stats()
+        results.append({
+            "turn": g.turn,
+            "player": g.p,
+            "depth": depth,
+            "move": list(pv[0]),
+            "pv": pv,
+            "score": score,
+            "nodes": stats.nodes(),
+            "time": stats.elapsed,
+            "nodes_per_sec": stats.nodes() / stats.elapsed,
+        })
+    return results
+
+
+# Matrix factorisation
+################################################################################
+# Make a seeded (rows x cols) matrix of rank k with values roughly in [0, 5]
+def synthetic_matrix(rows, cols, k, seed):
+    rng = random.Random(seed)
+    a = [[rng.uniform(0, 1.5) for _ in range(k)] for _ in range(rows)]
+    b = [[rng.uniform(0, 1.5) for _ in range(cols)] for _ in range(k)]
+    return [[sum(a[i][l] * b[l][j] for l in range(k)) for j in range(cols)] for i in range(rows)]
+
+
+# Time how long factorisation takes to converge, and the RMSE it converges to
+def bench_factorise(shapes=((4, 4, 2), (6, 5, 2), (8, 6, 3))):
+    from matrix_factorisation import factorise, matrix_multiply, mean_square_error
+
+    results = []
+    for rows, cols, k in shapes:
+        m0 = synthetic_matrix(rows, cols, k, SEED)
+        random.seed(SEED)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            m1, m2 = factorise(m0, k)
+        elapsed = time.perf_counter() - start
+        rmse = math.sqrt(mean_square_error(m0, matrix_multiply(m1, m2)))
+        results.append({"shape": [rows, cols], "k": k, "time": elapsed, "rmse": rmse})
+    return results
+
+
+# Markov chain text
+################################################################################
+# Write a seeded corpus of roughly size_mb megabytes, with a zipf-ish vocab
+def synthetic_corpus(path, size_mb, seed, vocab_size=5000):
+    rng = random.Random(seed)
+    vocab = ["".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=rng.randint(2, 9)))
+             for _ in range(vocab_size)]
+    weights = [1 / (i + 1) for i in range(vocab_size)]
+    written = 0
+    with open(path, "w") as f:
+        while written < size_mb * 1_000_000:
+            line = " ".join(rng.choices(vocab, weights, k=12)) + "\n"
+            f.write(line)
+            written += len(line)
+
+
+# Time reading the corpus into the word graph, and generating text from it
+def bench_markov(size_mb=2, word_count=50_000):
+    import markov_chain_text
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "corpus.txt")
+        synthetic_corpus(path, size_mb, SEED)
+        size = os.path.getsize(path)
+
+        markov_chain_text.word_graph.clear()
+        start = time.perf_counter()
+        words = markov_chain_text.read_words(path)
+        markov_chain_text.build_graph(words)
+        ingest = time.perf_counter() - start
+
+    random.seed(SEED)
+    start = time.perf_counter()
+    markov_chain_text.generate(word_count)
+    generate = time.perf_counter() - start
+    return {
+        "corpus_mb": size / 1_000_000,
+        "words": len(words),
+        "ingest_time": ingest,
+        "ingest_mb_per_sec": size / 1_000_000 / ingest,
+        "generated": word_count,
+        "generate_time": generate,
+        "tokens_per_sec": word_count / generate,
+    }
+
+
+# Magic knights tour
+################################################################################
+# Time the tour from every starting square
+def bench_knights_tour():
+    import magic_knights_tour
+
+    results = []
+    for y in range(8):
+        for x in range(8):
+            b = [[0] * 8 for _ in range(8)]
+            b[y][x] = 1
+            start = time.perf_counter()
+            solved = magic_knights_tour.tour(b, y, x)
+            results.append({
+                "start": chr(ord('a') + y) + str(x + 1),
+                "solved": solved,
+                "time": time.perf_counter() - start,
+            })
+    return results
+
+
+# Startup
+################################################################################
+# Time how long a fresh python process takes to import each reversi entry point,
+# against a process which imports nothing
+def bench_startup(runs=20, modules=("engine", "reversi", "batch")):
+    results = {}
+    for module in ("",) + modules:
+        code = f"import {module}" if module else "pass"
+        times = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-c", code], cwd=os.path.join(ROOT, "reversi"), check=True)
+            times.append(time.perf_counter() - start)
+        results[module or "python"] = {"min": min(times), "mean": sum(times) / runs}
+    return results
+
+
+# Driver code
+################################################################################
+BENCHMARKS = ["reversi", "factorise", "markov", "knights_tour", "startup"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the repo's benchmarks")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=BENCHMARKS)
+    parser.add_argument("--depth", type=int, default=4, help="reversi search depth")
+    parser.add_argument("--output", metavar="FILE", help="write results to FILE instead of stdout")
+    args = parser.parse_args()
+
+    runs = {
+        "reversi": lambda: bench_reversi(args.depth),
+        "factorise": bench_factorise,
+        "markov": bench_markov,
+        "knights_tour": bench_knights_tour,
+        "startup": bench_startup,
+    }
+    results = {
+        "python": platform.python_version(),
+        "seed": SEED,
+        "results": {},
+    }
+    for name in args.only:
+        start = time.perf_counter()
+        results["results"][name] = runs[name]()
+        print(f"{name} took {time.perf_counter() - start:.2f}s", file=sys.stderr)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
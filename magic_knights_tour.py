@@ -15,16 +15,22 @@ def main():
     b = [[0 for j in range(8)] for i in range(8)]
     b[y][x] = 1
     print_board(b)
-    if (((y == 2 or y == 5) and (x == 3 or x == 4))
-            or ((y == 3 or y == 4) and (x == 2 or x == 5))):
-        global max_stack
-        max_stack += 16
-    if solve(b, [y, x], 1, [quad_hash(y, x)], False):
+    if tour(b, y, x):
         print_board(b)
     else:
         print("Could not find solution")
 
 
+# Solve the tour on board b starting from the given square
+def tour(b, y, x):
+    global max_stack
+    max_stack = 16
+    if (((y == 2 or y == 5) and (x == 3 or x == 4))
+            or ((y == 3 or y == 4) and (x == 2 or x == 5))):
+        max_stack += 16
+    return solve(b, [y, x], 1, [quad_hash(y, x)], False)
+
+
 # Backtracking solve
 def solve(b, pos, turn, quad_stack, backtrack):
     if turn == 64:
@@ -10,14 +10,30 @@ def main():
 
     # Save words of text into an array
     file_path = (input("Enter file path: "))
+    words = read_words(file_path)
+
+    # Transfer words to a graph
+    build_graph(words)
+
+    # Generate text
+    word_count = int(input("Enter length of generated text: "))
+    print(" ".join(generate(word_count)), end=" ")
+    print()
+
+
+# Read the words of the text file
+def read_words(file_path):
     words = []
     with open(file_path, "r") as f:
         for line in f:
             for w in line.split():
                 w.lower().translate(str.maketrans('', '', string.punctuation))
                 words.append(w)
+    return words
 
-    # Transfer words to a graph
+
+# Count how often each word follows another in the word graph
+def build_graph(words):
     for i, curr in enumerate(words[:-1]):
         next = words[i + 1]
         if curr in word_graph.keys():
@@ -25,21 +41,23 @@ def main():
         else:
             word_graph[curr] = {next: 1}
 
-    # Generate text
-    word_count = int(input("Enter length of generated text: "))
+
+# Walk the word graph to generate word_count words
+def generate(word_count):
+    text = []
 
     # Choose random starting word in dict
     curr = random.choice(list(word_graph.keys()))
     for _ in range(word_count):
-        print(curr, end=" ")
-        next_words_dict = word_graph[curr]
+        text.append(curr)
+        next_words_dict = word_graph.get(curr)
         if next_words_dict:
             next_words = list(next_words_dict.keys())
             weights = list(next_words_dict.values())
             curr = random.choices(next_words, weights)[0]
         else:
             curr = random.choice(list(word_graph.keys()))
-    print()
+    return text
 
 
 if __name__ == "__main__":
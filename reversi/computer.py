@@ -1,47 +1,208 @@
 from __future__ import annotations
 
 import math
-import copy
 
-from game import Game, BLANK, DY, DX, DIRECTIONS, SIZE
+from game import Game, BLANK, DY, DX, DIRECTIONS, SIZE, RAYS
+from stats import SearchStats
 
 # Global variables because I'm lazy
 transposition_table: dict[int, dict[int, int]] = {}
 
+# Only recorded into while a search is being profiled, otherwise None
+stats: SearchStats | None = None
+
+# Results of searching interior nodes, keyed by zobrist key and player to move,
+# holding the depth searched, the score, whether it is exact or a bound, and
+# the best move found
+search_table: dict[tuple[int, int, int], tuple[int, int, int, tuple[int, int]]] = {}
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# Move ordering tables, the last moves to cause a cutoff at each ply, and how
+# much each square has caused cutoffs for each player
+killer_moves: dict[int, list[tuple[int, int]]] = {}
+history: list[list[list[int]]] = [[[0] * SIZE for _ in range(SIZE)] for _ in range(2)]
+
+# How many killer moves are remembered per ply
+KILLERS = 2
+
+# The bit each square sets in a zobrist key
+SQUARE_KEYS = [[1 << (y * SIZE + x) for x in range(SIZE)] for y in range(SIZE)]
+
+# Plies from the root where moves are still sorted by the full heuristic
+EVAL_SORT_PLIES = 0
+
+# The search works on scores rounded to thousandths, so windows have a width
+SCORE_SCALE = 1000
+
+# How far either side of the previous iteration's score the aspiration window is
+ASPIRATION = 2 * SCORE_SCALE
+
+# Width of the window used to prove a move is no better than the best so far
+NULL_WINDOW = 1
+
 
 # Actual AI algorithm (Algos code)
 ################################################################################
 # Main code
-def minimax(
+# Iteratively deepen the search, returns the score and the principal variation.
+# Scores swing between odd and even depths depending on who moved last, so it
+# deepens two plies at a time, keeping the same parity as the target depth, and
+# the previous iteration's score makes a good centre for the aspiration window
+def search(g: Game, depth: int) -> tuple[float, list[tuple[int, int]]]:
+    if depth < 1:
+        raise ValueError(f"search depth must be at least 1, got {depth}")
+    new_search()
+    score, pv = pvs(g, -math.inf, math.inf, 2 - depth % 2)
+    for curr_depth in range(4 - depth % 2, depth + 1, 2):
+        alpha, beta = score - ASPIRATION, score + ASPIRATION
+        score, pv = pvs(g, alpha, beta, curr_depth)
+
+        # Score fell outside the window, so open up that side and search again
+        if score <= alpha:
+            score, pv = pvs(g, -math.inf, beta, curr_depth)
+        elif score >= beta:
+            score, pv = pvs(g, alpha, math.inf, curr_depth)
+    return score / SCORE_SCALE, pv
+
+
+# Negamax principal variation search, scores are from the perspective of the
+# player whose turn it is
+def pvs(
     g: Game,
-    priority: int,
     alpha: float,
     beta: float,
-    depth: int
-) -> tuple[float, int, int]:
+    depth: int,
+    ply: int = 0
+) -> tuple[float, list[tuple[int, int]]]:
 
     if g.over() or depth == 0:
-        return find_score(g, priority)
-
-    valid_moves = heuristic_sort(g, g.find_valid(g.p))
-    best_y, best_x = valid_moves[0]
-    best_eval = -math.inf if g.p == priority else math.inf
+        if stats:
+            stats.leaves += 1
+        return find_score(g, g.p), []
 
-    for y, x in valid_moves:
-        new = copy.deepcopy(g)
+    # Reuse an earlier search of this position if it settles the null window,
+    # PV nodes are always searched so the whole principal variation is found
+    key = zobrist_key(g)
+    table_key = (key[0], key[1], g.p)
+    entry = search_table.get(table_key)
+    if entry and entry[0] >= depth and beta - alpha <= NULL_WINDOW:
+        _, score, bound, move = entry
+        if (bound == EXACT or (bound == LOWER and score >= beta)
+                or (bound == UPPER and score <= alpha)):
+            if stats:
+                stats.tt_cutoffs += 1
+            return score, [move]
+
+    if stats:
+        stats.interior += 1
+    best_move = entry[3] if entry else None
+    valid_moves = order_moves(g, g.find_valid(g.p), ply, best_move)
+    orig_alpha = alpha
+    best_eval = -math.inf
+    best_pv = [valid_moves[0]]
+
+    for i, (y, x) in enumerate(valid_moves):
+        new = g.copy(history=False)
         new.go(y, x)
-        new_eval = minimax(new, priority, alpha, beta, depth - 1)[0]
-        if g.p == priority:
-            if new_eval > best_eval:
-                best_eval, best_y, best_x = new_eval, y, x
-            alpha = max(alpha, best_eval)
+
+        # Search the first move with the full window, and prove the rest are
+        # worse with a null window, searching again if they aren't
+        if i == 0:
+            new_eval, pv = child_pvs(g, new, alpha, beta, depth - 1, ply + 1)
         else:
-            if new_eval < best_eval:
-                best_eval, best_y, best_x = new_eval, y, x
-            beta = min(beta, best_eval)
-        if beta <= alpha:
+            new_eval, pv = child_pvs(g, new, alpha, alpha + NULL_WINDOW, depth - 1, ply + 1)
+            if alpha < new_eval < beta:
+                new_eval, pv = child_pvs(g, new, new_eval, beta, depth - 1, ply + 1)
+
+        if new_eval > best_eval:
+            best_eval, best_pv = new_eval, [(y, x)] + pv
+        alpha = max(alpha, best_eval)
+        if alpha >= beta:
+            if stats:
+                stats.cutoff(i)
+            record_cutoff(g.p, y, x, depth, ply)
             break
-    return best_eval, best_y, best_x
+
+    if best_eval <= orig_alpha:
+        bound = UPPER
+    elif best_eval >= beta:
+        bound = LOWER
+    else:
+        bound = EXACT
+    search_table[table_key] = (depth, best_eval, bound, best_pv[0])
+    return best_eval, best_pv
+
+
+# Search a child position from the parent player's perspective. If the other
+# player had to pass, it's still the parent player's turn, so the score and
+# window aren't negated
+def child_pvs(
+    g: Game,
+    new: Game,
+    alpha: float,
+    beta: float,
+    depth: int,
+    ply: int
+) -> tuple[float, list[tuple[int, int]]]:
+
+    if new.p == g.p:
+        return pvs(new, alpha, beta, depth, ply)
+    new_eval, pv = pvs(new, -beta, -alpha, depth, ply)
+    return -new_eval, pv
+
+
+# Forget everything learnt from previous searches
+def clear_tables() -> None:
+    transposition_table.clear()
+    search_table.clear()
+    killer_moves.clear()
+    for player in range(2):
+        for y in range(SIZE):
+            history[player][y] = [0] * SIZE
+
+
+# Reset the move ordering tables which only make sense within one search
+def new_search() -> None:
+    killer_moves.clear()
+    for player in range(2):
+        for y in range(SIZE):
+            for x in range(SIZE):
+                history[player][y][x] >>= 1
+
+
+# Order moves by the transposition table's best move, then killer moves, then
+# history, then the square's static weight
+def order_moves(
+    g: Game,
+    valid_moves: list[tuple[int, int]],
+    ply: int,
+    best_move: tuple[int, int] | None = None
+) -> list[tuple[int, int]]:
+
+    if ply < EVAL_SORT_PLIES:
+        return heuristic_sort(g, valid_moves)
+
+    killers = killer_moves.get(ply, [])
+
+    def rating(move: tuple[int, int]) -> tuple[int, int, int]:
+        y, x = move
+        if move == best_move:
+            return (2, 0, 0)
+        if move in killers:
+            return (1, -killers.index(move), 0)
+        return (0, history[g.p][y][x], SQUARE_WEIGHTS[y][x])
+
+    return sorted(valid_moves, key=rating, reverse=True)
+
+
+# Remember the move which caused a cutoff as a killer move and in the history
+def record_cutoff(player: int, y: int, x: int, depth: int, ply: int) -> None:
+    history[player][y][x] += depth * depth
+    killers = killer_moves.setdefault(ply, [])
+    if (y, x) in killers:
+        killers.remove((y, x))
+    killers.insert(0, (y, x))
+    del killers[KILLERS:]
 
 
 # Sort moves according to which one seems better
@@ -49,39 +210,61 @@ def heuristic_sort(g: Game, valid_moves: list[tuple[int, int]]) -> list[tuple[in
     sorted_moves = []
     for move in valid_moves:
         y, x = move
-        new = copy.deepcopy(g)
+        new = g.copy(history=False)
         new.go(y, x)
+        if stats:
+            stats.sort_evals += 1
         rating = heuristic_score(new, g.p)
         sorted_moves.append({"move": move, "rating": rating})
     sorted_moves.sort(key=lambda x: x["rating"], reverse=True)
     return [move["move"] for move in sorted_moves]
 
 
-# Finds the score of the baord
-def find_score(g: Game, priority: int) -> tuple[float, int, int]:
+# Finds the score of the baord in thousandths, the transposition table holds
+# player 0's score
+def find_score(g: Game, priority: int) -> int:
     key = zobrist_key(g)
+    if stats:
+        if key[0] in transposition_table and key[1] in transposition_table[key[0]]:
+            stats.tt_hits += 1
+        else:
+            stats.tt_misses += 1
     if key[0] in transposition_table:
         if key[1] in transposition_table[key[0]]:
             score = transposition_table[key[0]][key[1]]
         else:
-            score = heuristic_score(g, priority)
+            score = round(heuristic_score(g, 0) * SCORE_SCALE)
             transposition_table[key[0]][key[1]] = score
     else:
-        score = heuristic_score(g, priority)
+        score = round(heuristic_score(g, 0) * SCORE_SCALE)
         transposition_table[key[0]] = {}
         transposition_table[key[0]][key[1]] = score
-    return (score, -1, -1)
+    return score if priority == 0 else -score
+
+
+# Start profiling the search, returning the stats that will be recorded into
+def start_stats() -> SearchStats:
+    global stats
+    stats = SearchStats()
+    return stats
+
+
+# Stop profiling the search, returning the stats that were recorded
+def stop_stats() -> SearchStats | None:
+    global stats
+    finished, stats = stats, None
+    if finished:
+        finished.finish()
+    return finished
 
 
 # Generates a zobrist key for the board
 def zobrist_key(g: Game) -> tuple[int, int]:
-    shift = 1
     key = [0, 0]
-    for y in range(8):
-        for x in range(8):
-            if g.b[y][x] in [0, 1]:
-                key[g.b[y][x]] += shift
-            shift *= 2
+    for y in range(SIZE):
+        for x in range(SIZE):
+            if g.b[y][x] != BLANK:
+                key[g.b[y][x]] += SQUARE_KEYS[y][x]
     return key
 
 
@@ -94,11 +277,18 @@ def heuristic_score(g: Game, player: int) -> int:
 
     # Each of these score functions will retrun a value out of 100
     # A bigger value = better for the player
-    mobility = mobility_score(g, player, oth_player)
-    corner = corner_score(g, player, oth_player)
-    frontier = frontier_score(g, player, oth_player)
-    weight = weight_score(g, player, oth_player)
-    stability = stability_score(g, player, oth_player)
+    if stats:
+        mobility = stats.timed("mobility", mobility_score, g, player, oth_player)
+        corner = stats.timed("corner", corner_score, g, player, oth_player)
+        frontier = stats.timed("frontier", frontier_score, g, player, oth_player)
+        weight = stats.timed("weight", weight_score, g, player, oth_player)
+        stability = stats.timed("stability", stability_score, g, player, oth_player)
+    else:
+        mobility = mobility_score(g, player, oth_player)
+        corner = corner_score(g, player, oth_player)
+        frontier = frontier_score(g, player, oth_player)
+        weight = weight_score(g, player, oth_player)
+        stability = stability_score(g, player, oth_player)
 
     # Corners are always weighted highly
     rating += 2 * corner
@@ -187,27 +377,18 @@ def square_stabil(g: Game, y: int, x: int) -> float:
 
     # Check every direction along current square's row, column, and diagonals
     for dir in range(DIRECTIONS):
-        nY = y
-        nX = x
 
         # Check every square in current direction
-        for _ in range(SIZE):
-            nY += DY[dir]
-            nX += DX[dir]
+        for nY, nX in RAYS[y][x][dir]:
 
-            # If it is still within the board
-            if g.in_lim(nY, nX):
+            # If the new square is blank
+            if g.b[nY][nX] == BLANK:
+                blanks[dir] += 1
 
-                # If the new square is blank
-                if g.b[nY][nX] == BLANK:
-                    blanks[dir] += 1
-
-                # If not blanks yet found in this direction and
-                # the current square is of the other player
-                if blanks[dir] == 0 and g.b[nY][nX] == opposition:
-                    oppositions[dir] == True
-            else:
-                break
+            # If not blanks yet found in this direction and
+            # the current square is of the other player
+            if blanks[dir] == 0 and g.b[nY][nX] == opposition:
+                oppositions[dir] == True
 
     # Double stability if square cannot be immediately flipped in a direction
     for dir in range(DIRECTIONS):
@@ -238,6 +419,16 @@ def square_stabil(g: Game, y: int, x: int) -> float:
 
 # Find the weight/ value of a square
 def square_weight(g: Game, y: int, x: int) -> float:
+    weight = SQUARE_WEIGHTS[y][x]
+    corner = near_corner(g, y, x)
+    if corner:
+        if g.b[corner['y']][corner['x']] == g.b[y][x]:
+            weight = 64
+    return weight
+
+
+# Find the weight of a square regardless of what is around it
+def base_weight(y: int, x: int) -> int:
     weight = 0
 
     # Find the distance of current coordinate from center
@@ -257,14 +448,12 @@ def square_weight(g: Game, y: int, x: int) -> float:
         weight <<= 2
     elif x_dist % 2 == 1 and y_dist % 2 == 1:
         weight >>= 2
-
-    corner = near_corner(g, y, x)
-    if corner:
-        if g.b[corner['y']][corner['x']] == g.b[y][x]:
-            weight = 64
     return weight
 
 
+SQUARE_WEIGHTS = [[base_weight(y, x) for x in range(SIZE)] for y in range(SIZE)]
+
+
 # Check if a square is one piece away from a corner
 def near_corner(g: Game, y: int, x: int) -> bool | dict[str, int]:
     for i in range(DIRECTIONS):
@@ -0,0 +1,57 @@
+# Headless entry point for the AI. Only the board and search are imported, so
+# worker processes start quickly. Reads positions as JSON lines from stdin, i.e.
+#   {"board": [[2, 2, 2, 2, 2, 2, 2, 2], ...], "player": 0, "depth": 4}
+# and writes the score and principal variation for each as a JSON line. The
+# positions are usually unrelated, so each search starts from empty tables,
+# otherwise a long running worker keeps every position it has ever searched.
+# Pass fresh=False to best_move to reuse them, i.e. when following one game
+from __future__ import annotations
+
+import sys
+
+from game import Game
+from computer import search, clear_tables
+
+DEPTH = 4
+
+
+# Find the best line of play for player on the given board
+def best_move(
+    b: list[list[int]],
+    player: int,
+    depth: int = DEPTH,
+    fresh: bool = True
+) -> tuple[float, list[tuple[int, int]]]:
+    if fresh:
+        clear_tables()
+    return search(Game.from_board(b, player), depth)
+
+
+def main():
+    import json
+
+    # A bad line gets an error record rather than stopping the worker, search
+    # raises a ValueError itself if the depth is less than 1
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            position = json.loads(line)
+            score, pv = best_move(
+                position["board"],
+                position["player"],
+                position.get("depth", DEPTH)
+            )
+        except json.JSONDecodeError as e:
+            result = {"error": f"invalid JSON: {e}"}
+        except KeyError as e:
+            result = {"error": f"missing {e}"}
+        except (ValueError, TypeError, IndexError) as e:
+            result = {"error": str(e)}
+        else:
+            result = {"score": score, "pv": pv}
+        print(json.dumps(result), flush=True)
+
+
+if __name__ == "__main__":
+    main()
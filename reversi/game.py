@@ -1,5 +1,4 @@
-from copy import deepcopy
-from colorama import Fore, Back, Style
+from __future__ import annotations
 
 BLANK = 2
 COLOUR = ["O", "X", " "]
@@ -8,6 +7,15 @@ DX = [0, 1, 1, 1, 0, -1, -1, -1]
 DIRECTIONS = 8
 SIZE = 8
 
+# The squares along each direction from each square, until the edge of the board
+RAYS = [[[[(y + mul * DY[direc], x + mul * DX[direc])
+           for mul in range(1, SIZE)
+           if 0 <= y + mul * DY[direc] < SIZE and 0 <= x + mul * DX[direc] < SIZE]
+          for direc in range(DIRECTIONS)]
+         for x in range(SIZE)]
+        for y in range(SIZE)]
+
+
 class Game(object):
     def __init__(self, player: int = 0):
         self.turn = 0
@@ -16,11 +24,46 @@ class Game(object):
         self.b = [[BLANK] * SIZE for _ in range(SIZE)]
         self.b[3][3] = self.b[4][4] = 0
         self.b[3][4] = self.b[4][3] = 1
-        self.move_stack = [deepcopy(self.b)]
+        self.move_stack = [[row[:] for row in self.b]]
         self.player_stack = [player]
 
+    # Make a game from a board, with player to move (unless they must pass)
+    @classmethod
+    def from_board(cls, b: list[list[int]], player: int) -> Game:
+        g = cls(player)
+        g.b = [row[:] for row in b]
+        g.turn = SIZE * SIZE - 4 - sum(row.count(BLANK) for row in b)
+        g.offset = (player - g.turn) % 2
+
+        # If player has to pass, it's the other player's turn, like in go
+        oth_player = (player + 1) % 2
+        if not g.find_valid(player) and g.find_valid(oth_player):
+            g.offset += 1
+            g.p = oth_player
+        g.move_stack = [[row[:] for row in g.b]]
+        g.player_stack = [g.p]
+        return g
+
+    # Copy the game, cheaper than a deepcopy as the board only holds ints. The
+    # search doesn't undo moves, so it copies without the history, which also
+    # stops every move it tries from snapshotting the board
+    def copy(self, history: bool = True) -> Game:
+        new = Game.__new__(Game)
+        new.turn = self.turn
+        new.p = self.p
+        new.offset = self.offset
+        new.b = [row[:] for row in self.b]
+        if history and self.move_stack is not None:
+            new.move_stack = self.move_stack[:]
+            new.player_stack = self.player_stack[:]
+        else:
+            new.move_stack = new.player_stack = None
+        return new
+
     # Print out the board
     def print_board(self) -> None:
+        from colorama import Fore, Back, Style
+
         print()
         print("   a b c d e f g h")
         print("   ________________")
@@ -61,12 +104,15 @@ class Game(object):
         if not self.find_valid(oth_player):
             self.offset += 1
         self.p = (self.turn + self.offset) % 2
-        self.move_stack.append(deepcopy(self.b))
-        self.player_stack.append(self.p)
+        if self.move_stack is not None:
+            self.move_stack.append([row[:] for row in self.b])
+            self.player_stack.append(self.p)
 
     # Undo a move
     def undo(self) -> None:
-        if self.turn > 0:
+        if self.move_stack is None:
+            print("Cannot undo, the game has no history")
+        elif self.turn > 0:
             print("Undoing the move")
             oth_player = self.player_stack[-1]
             while self.player_stack[-1] == oth_player:
@@ -76,7 +122,7 @@ class Game(object):
             self.turn -= 1
             del self.move_stack[-1]
             del self.player_stack[-1]
-            self.b = deepcopy(self.move_stack[-1])
+            self.b = [row[:] for row in self.move_stack[-1]]
             self.p = self.player_stack[-1]
         else:
             print("Cannot undo, no more previous moves")
@@ -85,10 +131,8 @@ class Game(object):
     def flip_squares(self, y: int, x: int, oth_player: int) -> None:
         flip_dirs = self.find_flips(y, x, oth_player, self.p)['flip_dirs']
         for direc in flip_dirs:
-            for mul in range(1, SIZE):
-                nY = y + mul * DY[direc]
-                nX = x + mul * DX[direc]
-                if not self.in_lim(nY, nX) or self.b[nY][nX] == self.p:
+            for nY, nX in RAYS[y][x][direc]:
+                if self.b[nY][nX] == self.p:
                     break
                 self.b[nY][nX] = self.p
 
@@ -113,17 +157,13 @@ class Game(object):
     def find_flips(self, y: int, x: int, oth_player: int, player: int) -> dict:
         flipped_count = 0
         flip_dirs = []
-        for direction in range(DIRECTIONS):
-            nY = y + DY[direction]
-            nX = x + DX[direction]
-            if self.in_lim(nY, nX) and self.b[nY][nX] == oth_player:
-                for curr_flipped in range(SIZE):
-                    if not self.in_lim(nY, nX) or self.b[nY][nX] == BLANK:
+        for direction, ray in enumerate(RAYS[y][x]):
+            if ray and self.b[ray[0][0]][ray[0][1]] == oth_player:
+                for curr_flipped, (nY, nX) in enumerate(ray):
+                    if self.b[nY][nX] == BLANK:
                         break
                     if self.b[nY][nX] == player:
                         flip_dirs.append(direction)
                         flipped_count += curr_flipped
                         break
-                    nY += DY[direction]
-                    nX += DX[direction]
         return {'flip_dirs': flip_dirs, 'flipped_count': flipped_count}
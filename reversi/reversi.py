@@ -1,22 +1,25 @@
 # Contains the code for implementation of reversi and minimax AI
 from __future__ import annotations
 
-import math
+import argparse
+import json
 import time
 
 from typing import Callable
 from game import Game, COLOUR
-from computer import *
-from colorama import Fore, Style
-
-# Global variable to check how many scenarios the algo checked
-# just exists for testing
-checked: int = 0
+from computer import search, start_stats, stop_stats
 
 
 # Driver code
 ################################################################################
 def main():
+    parser = argparse.ArgumentParser(description="Play reversi against the AI")
+    parser.add_argument(
+        "--stats", metavar="FILE",
+        help="profile each computer move, appending the stats as JSON lines to FILE"
+    )
+    args = parser.parse_args()
+
     g = Game()
     print("Game started")
     print("Enter positions as <letter><number>, i.e. a1")
@@ -36,12 +39,12 @@ def main():
             if option < 3:
                 human_turn(g, g.p)
             else:
-                computer_turn(g, depth)
+                computer_turn(g, depth, args.stats)
         else:
             if option % 2 == 1:
                 human_turn(g, g.p)
             else:
-                computer_turn(g, depth)
+                computer_turn(g, depth, args.stats)
 
         # Print out values
         print("Turn is", g.turn, "Player is", g.p)
@@ -66,10 +69,17 @@ def input_validator(func: Callable) -> Callable:
                 if input:
                     return input
             except:
-                print(Fore.RED + "Invalid input" + Style.RESET_ALL)
+                print_error("Invalid input")
     return wrapper
 
 
+# Print an error message in red
+def print_error(message: str) -> None:
+    from colorama import Fore, Style
+
+    print(Fore.RED + message + Style.RESET_ALL)
+
+
 # Take playing option input
 @input_validator
 def input_option() -> int | None:
@@ -79,7 +89,7 @@ def input_option() -> int | None:
         ))
     if 0 < option < 5:
         return option
-    print(Fore.RED + "Invalid option" + Style.RESET_ALL)
+    print_error("Invalid option")
 
 
 # Take depth of minimax search
@@ -88,7 +98,7 @@ def input_depth() -> int | None:
     depth = int(input("Enter depth of minimax search: "))
     if depth > 0:
         return depth
-    print(Fore.RED + "Invalid depth" + Style.RESET_ALL)
+    print_error("Invalid depth")
 
 
 # Take the input from human player
@@ -103,13 +113,20 @@ def human_turn(g: Game, player: int) -> bool:
     if g.in_lim(y, x) and g.valid(y, x, player):
         g.go(y, x)
         return True
-    print(Fore.RED + "Invalid choice" + Style.RESET_ALL)
-
-
-# Take the computer's turn
-def computer_turn(g: Game, depth: int) -> None:
-    best = minimax(g, g.p, -math.inf, math.inf, depth)
-    g.go(best[1], best[2])
+    print_error("Invalid choice")
+
+
+# Take the computer's turn, optionally appending the search's stats to a file
+def computer_turn(g: Game, depth: int, stats_path: str | None = None) -> None:
+    if stats_path:
+        start_stats()
+    score, pv = search(g, depth)
+    if stats_path:
+        record = {"turn": g.turn, "player": g.p, "depth": depth, "score": score, "pv": pv}
+        record.update(stop_stats().to_dict())
+        with open(stats_path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+    g.go(*pv[0])
 
 
 if __name__ == "__main__":
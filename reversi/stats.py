@@ -0,0 +1,65 @@
+# Opt-in instrumentation for the AI's search and heuristics
+from __future__ import annotations
+
+import time
+
+from collections.abc import Callable
+
+HEURISTICS = ["mobility", "frontier", "stability", "weight", "corner"]
+
+
+class SearchStats(object):
+    def __init__(self):
+        self.interior = 0
+        self.leaves = 0
+        self.sort_evals = 0
+        self.cutoffs = 0
+        self.cutoff_index: dict[int, int] = {}
+        self.tt_hits = 0
+        self.tt_misses = 0
+        self.tt_cutoffs = 0
+        self.heuristic_time = {name: 0.0 for name in HEURISTICS}
+        self.start = time.perf_counter()
+        self.elapsed = 0.0
+
+    # Record a beta cutoff, and which move in the ordering caused it
+    def cutoff(self, index: int) -> None:
+        self.cutoffs += 1
+        self.cutoff_index[index] = self.cutoff_index.get(index, 0) + 1
+
+    # Run one heuristic component, adding its runtime to the totals
+    def timed(self, name: str, func: Callable, *args) -> float:
+        start = time.perf_counter()
+        score = func(*args)
+        self.heuristic_time[name] += time.perf_counter() - start
+        return score
+
+    # Stop the clock for the search
+    def finish(self) -> None:
+        self.elapsed = time.perf_counter() - self.start
+
+    # Total number of positions the search looked at, including the children
+    # that were only made and evaluated to sort moves
+    def nodes(self) -> int:
+        return self.interior + self.leaves + self.sort_evals
+
+    # Summarise the stats as a JSON serialisable dict
+    def to_dict(self) -> dict:
+        return {
+            "nodes": self.nodes(),
+            "interior": self.interior,
+            "leaves": self.leaves,
+            "sort_evals": self.sort_evals,
+            "cutoffs": self.cutoffs,
+            "cutoff_index": {str(i): n for i, n in sorted(self.cutoff_index.items())},
+            "tt_hits": self.tt_hits,
+            "tt_misses": self.tt_misses,
+            "tt_cutoffs": self.tt_cutoffs,
+            "heuristic_time": self.heuristic_time,
+            "elapsed": self.elapsed,
+        }
+
+    def to_json(self) -> str:
+        import json
+
+        return json.dumps(self.to_dict())